@@ -1,10 +1,15 @@
-﻿import pandas as pd
-import requests
+﻿import csv
+import orjson
 from pathlib import Path
+from http_client import make_session
+
+# Pooled session so the three GBFS requests share one keep-alive connection.
+SESSION = make_session()
 
 def build_station_hour_data():
     """
     Fetch GBFS station_information and station_status data and create station availability dataset.
+    Returns the station rows written to station_data.csv as tuples, or None on error.
     """
     # Define paths
     script_dir = Path(__file__).parent
@@ -18,50 +23,50 @@ def build_station_hour_data():
     
     try:
         # Get auto-discovery file
-        response = requests.get(gbfs_url)
+        response = SESSION.get(gbfs_url)
         response.raise_for_status()
-        gbfs_data = response.json()
+        gbfs_data = orjson.loads(response.content)
         
         # Extract feed URLs
         feeds = {feed['name']: feed['url'] for feed in gbfs_data['data']['en']['feeds']}
         
         # Fetch station_information (static data: name, capacity, location)
         print("Fetching station_information...")
-        station_info_response = requests.get(feeds['station_information'])
+        station_info_response = SESSION.get(feeds['station_information'])
         station_info_response.raise_for_status()
-        station_info = station_info_response.json()['data']['stations']
-        
-        # Create DataFrame with station information
-        stations_df = pd.DataFrame(station_info)
+        station_info = orjson.loads(station_info_response.content)['data']['stations']
         
         # Select relevant columns
         # Note: 'capacity' field contains total docking capacity
         columns_to_keep = ['station_id', 'name', 'capacity', 'lat', 'lon']
-        stations_df = stations_df[columns_to_keep]
-        
-        # Rename for clarity
-        stations_df.columns = ['station_id', 'station_name', 'station_capacity', 'latitude', 'longitude']
+        stations = [tuple(s.get(col) for col in columns_to_keep) for s in station_info]
         
-        # Export to CSV
+        # Export to CSV, renaming columns for clarity
+        header = ['station_id', 'station_name', 'station_capacity', 'latitude', 'longitude']
         output_file = output_path / 'station_data.csv'
-        stations_df.to_csv(output_file, index=False)
+        with output_file.open('w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(stations)
         
         print(f"Successfully created {output_file}")
-        print(f"Total stations: {len(stations_df)}")
+        print(f"Total stations: {len(stations)}")
         print(f"\nFirst few rows:")
-        print(stations_df.head())
+        print(header)
+        for row in stations[:5]:
+            print(row)
         
         # Check if capacity changes over time by fetching station_status
         print("\n" + "="*50)
         print("Checking if capacity changes over time...")
-        station_status_response = requests.get(feeds['station_status'])
+        station_status_response = SESSION.get(feeds['station_status'])
         station_status_response.raise_for_status()
-        station_status = station_status_response.json()['data']['stations']
+        station_status = orjson.loads(station_status_response.content)['data']['stations']
         
         # Check if 'num_docks_available' varies from static capacity
-        status_df = pd.DataFrame(station_status)
+        status_fields = list(dict.fromkeys(key for s in station_status for key in s))
         
-        print(f"\nstation_status fields: {status_df.columns.tolist()}")
+        print(f"\nstation_status fields: {status_fields}")
         print("\n⚠️  IMPORTANT NOTE:")
         print("The 'capacity' field in station_information is STATIC (doesn't change).")
         print("For real-time availability, you need station_status which has:")
@@ -69,7 +74,7 @@ def build_station_hour_data():
         print("  - num_docks_available: empty docks at station")
         print("  - capacity = num_bikes_available + num_docks_available")
         
-        return stations_df
+        return stations
         
     except Exception as e:
         print(f"Error: {e}")
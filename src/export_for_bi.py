@@ -1,11 +1,147 @@
-<<<<<<< HEAD
 ﻿import pandas as pd
 import os
+import csv
+import multiprocessing as mp
 from pathlib import Path
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import orjson
+from charset_normalizer import from_bytes
+
+# Station id columns per schema variant:
+# Old format: from_station_id, to_station_id
+# New format: Start Station Id, End Station Id
+STATION_COLUMN_PAIRS = [
+    ("from_station_id", "to_station_id"),
+    ("Start Station Id", "End Station Id"),
+]
+
+CSV_BLOCK_SIZE = 8 << 20
+
+# Per-file results are cached in data/interim keyed by (path, mtime_ns, size),
+# so historical monthly CSVs that never change are only parsed once.
+# v2: station ids are stored in canonical form (see _normalise_station_ids).
+CACHE_FILENAME = ".ridership_cache.v2.parquet"
+CACHE_SCHEMA = pa.schema([
+    ("path", pa.string()),
+    ("mtime_ns", pa.int64()),
+    ("size", pa.int64()),
+    ("row_count", pa.int64()),
+    ("station_ids_json", pa.string()),
+])
+
+def _sniff_encoding(path: Path, n: int = 65536) -> str:
+    """
+    Guess the file encoding from its first n bytes; defaults to utf-8 when undecided.
+    """
+    with open(path, "rb") as f:
+        best = from_bytes(f.read(n)).best()
+    if best is None or best.encoding in ("ascii", "utf_8"):
+        # Arrow only takes its native (non-transcoding) path for "utf8"
+        return "utf8"
+    return best.encoding
+
+def _read_header(path: Path, encoding: str) -> list[str]:
+    with open(path, encoding=encoding, errors="replace", newline="") as f:
+        header = next(csv.reader(f), [])
+    if header:
+        header[0] = header[0].lstrip("\ufeff")
+    return header
+
+def _normalise_station_ids(ids):
+    """
+    Canonicalise numeric-looking ids so '7000', ' 7000', '07000' and '7000.0' count once,
+    as they did when pandas parsed the id columns as numbers.
+    """
+    ids = pc.utf8_trim_whitespace(ids)
+    ids = pc.replace_substring_regex(ids, pattern=r"^0*(\d+)(?:\.0*)?$", replacement=r"\1")
+    return pc.filter(ids, pc.not_equal(ids, ""))
+
+def _scan_file(
+    path: Path, encoding: str, columns: list[str], station_cols, header: list[str]
+) -> tuple[int, set[str]]:
+    """
+    Stream only `columns` of the CSV in record batches of about CSV_BLOCK_SIZE bytes.
+    Returns (row_count, unique station ids); peak memory stays around one batch.
+    Rows with the wrong field count are still counted, taking their station ids by
+    position (as pandas padded short rows), instead of failing the whole file.
+    """
+    station_positions = [header.index(col) for col in station_cols]
+    ragged_rows = 0
+    ragged_ids = []
+
+    def _on_invalid_row(row):
+        nonlocal ragged_rows
+        ragged_rows += 1
+        fields = next(csv.reader([row.text]), [])
+        ragged_ids.extend(fields[i] for i in station_positions if i < len(fields) and fields[i])
+        return "skip"
+
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(encoding=encoding, block_size=CSV_BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(invalid_row_handler=_on_invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: pa.string() for col in columns},
+            strings_can_be_null=True,
+        ),
+    )
+    row_count = 0
+    batch_uniques = []
+    for batch in reader:
+        row_count += batch.num_rows
+        for col in station_cols:
+            batch_uniques.append(pc.unique(batch.column(col)))
+    batch_uniques.append(pa.array(ragged_ids, type=pa.string()))
+    raw_ids = pc.unique(pa.chunked_array(batch_uniques, type=pa.string())).drop_null()
+    station_ids = pc.unique(_normalise_station_ids(raw_ids))
+    return row_count + ragged_rows, set(station_ids.to_pylist())
+
+def _load_cache(cache_path: Path) -> dict[str, dict]:
+    if not cache_path.exists():
+        return {}
+    try:
+        return {row["path"]: row for row in pq.read_table(cache_path, schema=CACHE_SCHEMA).to_pylist()}
+    except (OSError, pa.ArrowInvalid) as e:
+        print(f"Ignoring unreadable cache {cache_path.name}: {e}")
+        return {}
+
+def _save_cache(cache_path: Path, entries: list[dict]):
+    pq.write_table(pa.Table.from_pylist(entries, schema=CACHE_SCHEMA), cache_path)
+
+def _count_file(csv_file: Path) -> tuple[int, set[str]] | None:
+    """
+    Return (trip_count, station_ids) for one ridership CSV, or None if it could not be read.
+    Runs in a worker process.
+    """
+    print(f"  Reading: {csv_file.name}")
+    
+    try:
+        # Sniff the encoding once, then parse only the station id columns
+        encoding = _sniff_encoding(csv_file)
+        columns = _read_header(csv_file, encoding)
+        station_cols = next((pair for pair in STATION_COLUMN_PAIRS if pair[0] in columns), None)
+        usecols = list(station_cols) if station_cols else columns[:1]
+        if not station_cols:
+            print(f"  Warning: Unknown column format in {csv_file.name}")
+            station_cols = ()
+        try:
+            return _scan_file(csv_file, encoding, usecols, station_cols, columns)
+        except pa.ArrowInvalid:
+            # Prefix looked like utf-8 but the tail is not; latin-1 always decodes
+            return _scan_file(csv_file, "latin-1", usecols, station_cols, columns)
+    
+    except Exception as e:
+        print(f"  Error processing {csv_file.name}: {e}")
+        return None
 
 def process_ridership_data():
     """
     Process monthly ridership data to create BI summary with total trips and unique stations.
+    Changed files are parsed in parallel across CPU cores; unchanged ones come from the cache.
     """
     # Define paths
     interim_path = Path(__file__).parent.parent / "data" / "interim"
@@ -14,54 +150,53 @@ def process_ridership_data():
     # Create output directory if it doesn't exist
     output_path.mkdir(parents=True, exist_ok=True)
     
-    total_trips = 0
-    unique_stations = set()
-    
-    # Iterate through all subdirectories in interim folder
+    # Collect all CSV files from the subdirectories of the interim folder
+    csv_files = []
     for folder in interim_path.iterdir():
         if folder.is_dir():
             print(f"Processing folder: {folder.name}")
-            
-            # Process all CSV files in the folder
-            for csv_file in folder.glob("*.csv"):
-                print(f"  Reading: {csv_file.name}")
-                
-                try:
-                    # Try multiple encodings
-                    df = None
-                    for encoding in ['utf-8', 'latin-1', 'windows-1252', 'cp1252']:
-                        try:
-                            df = pd.read_csv(csv_file, encoding=encoding)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if df is None:
-                        print(f"  Error: Could not decode {csv_file.name}")
-                        continue
-                    
-                    # Count trips
-                    total_trips += len(df)
-                    
-                    # Handle different column naming conventions
-                    # Old format: from_station_id, to_station_id
-                    # New format: Start Station Id, End Station Id
-                    if 'from_station_id' in df.columns:
-                        unique_stations.update(df['from_station_id'].dropna().unique())
-                        unique_stations.update(df['to_station_id'].dropna().unique())
-                    elif 'Start Station Id' in df.columns:
-                        unique_stations.update(df['Start Station Id'].dropna().unique())
-                        unique_stations.update(df['End Station Id'].dropna().unique())
-                    else:
-                        print(f"  Warning: Unknown column format in {csv_file.name}")
-                    
-                except Exception as e:
-                    print(f"  Error processing {csv_file.name}: {e}")
+            csv_files.extend(folder.glob("*.csv"))
+    
+    # Reuse cached counts for files whose mtime and size are unchanged
+    cache_path = interim_path / CACHE_FILENAME
+    cache = _load_cache(cache_path)
+    entries = {}
+    stale = []
+    for csv_file in csv_files:
+        key = csv_file.relative_to(interim_path).as_posix()
+        stat = csv_file.stat()
+        cached = cache.get(key)
+        if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+            entries[key] = cached
+        else:
+            stale.append((key, csv_file, stat))
+    print(f"Using cached counts for {len(entries)} files; parsing {len(stale)}")
+    
+    if stale:
+        with mp.Pool(processes=os.cpu_count()) as pool:
+            results = pool.map(_count_file, [csv_file for _, csv_file, _ in stale])
+        for (key, _, stat), result in zip(stale, results):
+            if result is None:
+                continue
+            row_count, station_ids = result
+            entries[key] = {
+                "path": key,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "row_count": row_count,
+                "station_ids_json": orjson.dumps(sorted(station_ids)).decode(),
+            }
+    if entries.keys() != cache.keys() or stale:
+        _save_cache(cache_path, list(entries.values()))
+    
+    total_trips = sum(entry["row_count"] for entry in entries.values())
+    unique_stations = set().union(*(orjson.loads(entry["station_ids_json"]) for entry in entries.values()))
+    num_unique_stations = len(unique_stations)
     
     # Create summary dataframe
     summary_df = pd.DataFrame({
         'Total_trips': [total_trips],
-        'Num_unique_stations': [len(unique_stations)]
+        'Num_unique_stations': [num_unique_stations]
     })
     
     # Save to CSV
@@ -72,7 +207,7 @@ def process_ridership_data():
     print(f"Summary Report")
     print(f"{'='*50}")
     print(f"Total Trips: {total_trips:,}")
-    print(f"Unique Stations: {len(unique_stations):,}")
+    print(f"Unique Stations: {num_unique_stations:,}")
     print(f"\nOutput saved to: {output_file}")
     
     return summary_df
@@ -1,30 +1,63 @@
 ﻿import os
-import json
+import csv
+import functools
+import orjson
 from pathlib import Path
 from urllib.parse import urlparse
-import requests
-<<<<<<< HEAD
-import csv
+import shutil
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from config import BASE_URL, PACKAGE_ID_RIDERSHIP, PACKAGE_ID_STATION, API
+from http_client import TokenBucket, make_session
  
 
 # This file handles downloading metadata and files from Toronto's Open Data Portal CKAN instance.
 # It saves package metadata, resource metadata, and downloads non-datastore resources
 # It also downloads station information and status from the GBFS feed and saves as CSV.
 
+__all__ = [
+    "get_package_json",
+    "print_and_save_non_datastore_resources",
+    "download_station_data",
+]
+
 RAW_DIR = Path("data") / "raw"
+RAW_DIR.mkdir(parents=True, exist_ok=True)
 
 DOWNLOAD_FORMAT_WHITELIST = {"CSV", "JSON", "ZIP", "XLS", "XLSX", "GEOJSON", "PARQUET"}
 DOWNLOAD_SUFFIX_WHITELIST = {".csv", ".json", ".zip", ".xls", ".xlsx", ".geojson", ".parquet"}
 
-=======
-from config import BASE_URL, PACKAGE_ID_RIDERSHIP, PACKAGE_ID_STATION, API
+# One pooled session for every CKAN/GBFS call so keep-alive sockets are reused.
+SESSION = make_session()
 
-RAW_DIR = Path("data") / "raw"
+# Cached GBFS discovery/feed JSON younger than this is reused instead of refetched.
+GBFS_CACHE_TTL_SECONDS = 3600
+
+# Large buffer for copying response bodies straight from the raw urllib3 stream.
+DOWNLOAD_CHUNK_SIZE = 16 << 20
+
+# Resource downloads run on a small thread pool sharing SESSION.
+RESOURCE_WORKERS = 8
+CKAN_REQUESTS_PER_SECOND = 5
+
+_PRINT_LOCK = threading.Lock()
+
+def _log(message):
+    with _PRINT_LOCK:
+        print(message)
+
+# Every CKAN request takes a token first, so parallel workers stay under the
+# portal's rate limit instead of tripping 429s and backing off together.
+CKAN_BUCKET = TokenBucket(CKAN_REQUESTS_PER_SECOND)
+
+def _ckan_get(url: str, **kwargs):
+    CKAN_BUCKET.acquire()
+    return SESSION.get(url, **kwargs)
 
->>>>>>> 2849b4a22882a8be5f61de6c73303a6464272473
 def get_package_json(package_id: str):
     """
     Mirrors the original 'package_show' request:
@@ -32,43 +65,80 @@ def get_package_json(package_id: str):
     """
     url = BASE_URL + API["package_show"]
     params = {"id": package_id}
-    return requests.get(url, params=params).json()
+    response = _ckan_get(url, params=params)
+    print(f"package_show {package_id}: Content-Encoding={response.headers.get('Content-Encoding', 'identity')}")
+    return orjson.loads(response.content)
 
-def _safe_write_json(obj, path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+def _safe_write_json(obj, path: Path, ensure_dir: bool = True):
+    # Callers that already created path.parent pass ensure_dir=False to skip the syscalls
+    if ensure_dir:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
+@functools.lru_cache(maxsize=512)
 def _filename_from_url(url: str, fallback: str) -> str:
     name = os.path.basename(urlparse(url).path)
     return name if name else fallback
 
-<<<<<<< HEAD
 def _collect_fieldnames(rows):
-    ordered = []
-    for row in rows:
-        for key in row.keys():
-            if key not in ordered:
-                ordered.append(key)
-    return ordered
-
-def _write_csv(path: Path, rows, fieldnames):
+    # dict keeps first-seen order and gives O(1) membership checks
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+def _to_arrow_array(values) -> pa.Array:
+    """
+    Arrow array for one CSV field. Nested values (lists/objects) and fields mixing
+    scalar types across rows are stored as str(value), exactly the text DictWriter wrote.
+    """
+    kinds = {type(v) for v in values if v is not None}
+    if list in kinds or dict in kinds or len(kinds) > 1:
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values)
+
+def _rows_to_table(rows) -> pa.Table:
+    """
+    Build an Arrow table over the union of keys in rows (first-seen column order).
+    """
+    return pa.table({
+        name: _to_arrow_array([row.get(name) for row in rows])
+        for name in _collect_fieldnames(rows)
+    })
+
+def _coalesce_columns(preferred, fallback):
+    """
+    Take preferred where it is non-null, else fallback; mismatched types fall back to str().
+    """
+    if preferred.type == pa.null():
+        return fallback
+    if fallback.type == pa.null():
+        return preferred
+    if preferred.type != fallback.type:
+        merged = [p if p is not None else f for p, f in zip(preferred.to_pylist(), fallback.to_pylist())]
+        return _to_arrow_array(merged)
+    return pc.coalesce(preferred, fallback)
+
+def _write_table_csv(tbl: pa.Table, path: Path):
+    """
+    Write tbl in the same format as csv.DictWriter: minimal quoting, str() of each
+    value (so True/False and Python reprs), empty fields for nulls.
+    """
+    columns = [col.to_pylist() for col in tbl.columns]
     with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(rows)
-
-def _dedupe_by_station_id(rows):
-    seen = set()
-    deduped = []
-    for row in rows:
-        sid = row.get("station_id")
-        if sid and sid in seen:
-            continue
-        if sid:
-            seen.add(sid)
-        deduped.append(row)
-    return deduped
+        writer = csv.writer(f)
+        writer.writerow(tbl.column_names)
+        writer.writerows(zip(*columns))
+
+def _dedupe_by_station_id(tbl: pa.Table) -> pa.Table:
+    """
+    Keep the first row per station_id (rows without one are all kept), in original order.
+    """
+    if "station_id" not in tbl.column_names:
+        return tbl
+    sid = tbl.column("station_id")
+    keyed = pa.table({"station_id": sid, "__row": pa.array(range(tbl.num_rows), pa.int64())})
+    first = keyed.filter(pc.is_valid(sid)).group_by("station_id").aggregate([("__row", "min")])
+    orphans = keyed.filter(pc.is_null(sid))
+    keep = pa.chunked_array(first.column("__row_min").chunks + orphans.column("__row").chunks, pa.int64())
+    return tbl.take(pc.take(keep, pc.sort_indices(keep)))
 
 def _locate_cached_file(filename: str):
     for candidate in RAW_DIR.rglob(filename):
@@ -76,6 +146,12 @@ def _locate_cached_file(filename: str):
             return candidate
     return None
 
+def _is_fresh(path: Path, max_age: float = GBFS_CACHE_TTL_SECONDS) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime < max_age
+    except OSError:
+        return False
+
 def _is_downloadable_resource(file_format: str, file_url: str) -> bool:
     suffix = Path(urlparse(file_url).path).suffix.lower()
     return (
@@ -83,22 +159,87 @@ def _is_downloadable_resource(file_format: str, file_url: str) -> bool:
         or suffix in DOWNLOAD_SUFFIX_WHITELIST
     )
 
-def _head_content_length(url: str) -> int | None:
+def _remote_content_length(url: str) -> int | None:
+    """
+    Total size of a remote file from a one-byte ranged GET ("Content-Range: bytes 0-0/<total>").
+    Falls back to Content-Length when the server ignores Range.
+    """
     try:
-        r = requests.head(url, timeout=15, allow_redirects=True)
-        if r.ok:
-            return int(r.headers.get("content-length") or 0) or None
+        with _ckan_get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=15) as r:
+            if r.status_code == 206:
+                total = r.headers.get("content-range", "").rpartition("/")[2]
+                return int(total) if total.isdigit() else None
+            if r.ok:
+                return int(r.headers.get("content-length") or 0) or None
     except Exception:
         pass
     return None
 
-def _download_with_resume(file_url: str, dest: Path, max_retries: int = 4) -> bool:
+def _response_total_size(r) -> int | None:
+    """
+    Full size of the file behind a download response: Content-Range's total for a 206,
+    Content-Length for a 200 (only when the body is not content-encoded).
+    """
+    if r.status_code == 206:
+        total = r.headers.get("content-range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    if r.headers.get("content-encoding", "identity") != "identity":
+        return None
+    length = r.headers.get("content-length", "")
+    return int(length) if length.isdigit() else None
+
+def _validators_path(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".etag.json")
+
+def _load_validators(dest: Path) -> dict:
+    """
+    Return the ETag/Last-Modified saved for a completed download, or {} if none.
+    """
+    try:
+        return orjson.loads(_validators_path(dest).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+def _save_validators(dest: Path, response):
+    validators = {key: response.headers[key] for key in ("ETag", "Last-Modified") if key in response.headers}
+    if validators:
+        _safe_write_json(validators, _validators_path(dest), ensure_dir=False)
+
+def _preallocate(f, size: int) -> bool:
+    """
+    Reserve `size` bytes for a fresh download so the filesystem can use large extents.
+    Returns False where posix_fallocate is unavailable or unsupported.
+    """
+    if not hasattr(os, "posix_fallocate"):
+        return False
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError:
+        return False
+    return True
+
+def _download_with_resume(
+    file_url: str,
+    dest: Path,
+    max_retries: int = 4,
+    expected_size: int | None = None,
+) -> bool:
     """
     Stream download with HTTP Range resume support and basic size verification.
+    expected_size (e.g. CKAN's resource 'size') is trusted when given; otherwise it is probed.
+    dest.parent must already exist.
+    Completed downloads store their ETag/Last-Modified next to the file so reruns
+    issue a conditional GET and skip the body on 304 Not Modified.
     Returns True if file is present and looks valid.
     """
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    expected_size = _head_content_length(file_url)
+    if expected_size is None:
+        expected_size = _remote_content_length(file_url)
+
+    existing = dest.stat().st_size if dest.exists() else 0
+    if existing and existing == expected_size:
+        return True
+    # Validators only exist for complete files, so they never combine with a Range resume
+    validators = _load_validators(dest) if existing else {}
 
     for attempt in range(1, max_retries + 1):
         try:
@@ -106,16 +247,38 @@ def _download_with_resume(file_url: str, dest: Path, max_retries: int = 4) -> bo
             headers = {}
             mode = "wb"
             existing = dest.stat().st_size if dest.exists() else 0
-            if existing and (expected_size is None or existing < expected_size):
+            if validators:
+                if "ETag" in validators:
+                    headers["If-None-Match"] = validators["ETag"]
+                if "Last-Modified" in validators:
+                    headers["If-Modified-Since"] = validators["Last-Modified"]
+            elif existing and (expected_size is None or existing < expected_size):
                 headers["Range"] = f"bytes={existing}-"
                 mode = "ab"
 
-            with requests.get(file_url, stream=True, headers=headers, timeout=60) as r:
+            with _ckan_get(file_url, stream=True, headers=headers, timeout=60) as r:
                 r.raise_for_status()
+                if r.status_code == 304:
+                    _log(f"Not modified: {dest.name}")
+                    return True
+                if r.status_code != 206:
+                    # Server ignored the Range header and sent the whole file
+                    mode = "wb"
+                # The response's own size beats a possibly stale CKAN 'size'
+                expected_size = _response_total_size(r) or expected_size
+                # The file is about to change; drop validators until it is complete again
+                validators = {}
+                _validators_path(dest).unlink(missing_ok=True)
                 with dest.open(mode) as f:
-                    for chunk in r.iter_content(chunk_size=2 * 1024 * 1024):
-                        if chunk:
-                            f.write(chunk)
+                    # Appends always land at EOF, so only fresh files can be preallocated
+                    preallocated = mode == "wb" and expected_size is not None and _preallocate(f, expected_size)
+                    try:
+                        r.raw.decode_content = True
+                        shutil.copyfileobj(r.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+                    finally:
+                        if preallocated:
+                            # fallocate grew the file; trim back to the bytes actually written
+                            f.truncate()
 
             # Size check if we know expected_size
             if expected_size is not None and dest.stat().st_size != expected_size:
@@ -123,82 +286,85 @@ def _download_with_resume(file_url: str, dest: Path, max_retries: int = 4) -> bo
                 time.sleep(1.5 * attempt)
                 continue
 
+            _save_validators(dest, r)
             return True
         except Exception as e:
             if attempt == max_retries:
-                print(f"Download failed: {file_url} -> {e}")
+                _log(f"Download failed: {file_url} -> {e}")
                 break
             # Remove corrupt partial if server doesn't support range
             time.sleep(1.5 * attempt)
     return dest.exists() and (expected_size is None or dest.stat().st_size >= (expected_size * 0.95))
 
-=======
->>>>>>> 2849b4a22882a8be5f61de6c73303a6464272473
 def print_and_save_non_datastore_resources(package_json, package_id: str):
     """
     Keeps the original behavior (prints resource metadata), and ALSO:
-      - writes package.json to data/raw/
-      - writes each resource_show JSON to data/raw/resource_{idx}_{id}_metadata.json
-      - if resource_show has a 'result.url', downloads that file into data/raw/
+      - writes package.json to data/raw/{package_id}/
+      - writes each resource's metadata to data/raw/{package_id}/metadata/{idx:02d}_{id}_metadata.json
+        (in resource_show's {"result": ...} shape, taken from package_show's resources list)
+      - if the resource has a downloadable 'url', downloads that file into
+        data/raw/{package_id}/downloads/
     """
-<<<<<<< HEAD
     pkg_dir = RAW_DIR / package_id
     metadata_dir = pkg_dir / "metadata"
     download_dir = pkg_dir / "downloads"
     metadata_dir.mkdir(parents=True, exist_ok=True)
     download_dir.mkdir(parents=True, exist_ok=True)
 
-    _safe_write_json(package_json, pkg_dir / "package.json")
-=======
-    # Save package metadata
-    _safe_write_json(package_json, RAW_DIR / "package.json")
->>>>>>> 2849b4a22882a8be5f61de6c73303a6464272473
-
-    for idx, resource in enumerate(package_json["result"]["resources"]):
-        if not resource.get("datastore_active", False):
-            # Fetch resource_show metadata
-            url = BASE_URL + API["resource_show"]
-            params = {"id": resource["id"]}
-            resource_metadata = requests.get(url, params=params).json()
-
-            # Original behavior: print it
-            print(resource_metadata)
-
-<<<<<<< HEAD
-            meta_path = metadata_dir / f"{idx:02d}_{resource['id']}_metadata.json"
-            _safe_write_json(resource_metadata, meta_path)
-
-            result = resource_metadata.get("result", {})
-            file_url = result.get("url")
-            file_format = (result.get("format") or resource.get("format") or "").upper()
-            if file_url and _is_downloadable_resource(file_format, file_url):
-                filename = _filename_from_url(file_url, f"{resource['id']}.bin")
-                dest = download_dir / filename
-
-                # Skip if already complete
-                expected = result.get("size") or 0
-                try:
-                    expected = int(expected)
-                except Exception:
-                    expected = 0
-                if dest.exists() and expected > 0 and dest.stat().st_size == expected:
-                    print(f"Skipping {filename} (already complete)")
-                    continue
-
-                ok = _download_with_resume(file_url, dest, max_retries=5)
-                if ok:
-                    print(f"Saved file: {dest}")
-                else:
-                    if dest.exists():
-                        dest.unlink(missing_ok=True)
-                    print(f"Could not download {file_url}")
-            elif file_url:
-                print(f"Skipping non-data resource '{resource.get('name')}' ({file_format or 'unknown'}).")
+    _safe_write_json(package_json, pkg_dir / "package.json", ensure_dir=False)
+
+    def _process_resource(item):
+        idx, resource = item
+        # package_show already returns the full resource dict, so no resource_show round trip
+        resource_metadata = {"result": resource}
+
+        # Original behavior: print it
+        _log(resource_metadata)
+
+        meta_path = metadata_dir / f"{idx:02d}_{resource['id']}_metadata.json"
+        _safe_write_json(resource_metadata, meta_path, ensure_dir=False)
+
+        result = resource_metadata.get("result", {})
+        file_url = result.get("url")
+        file_format = (result.get("format") or resource.get("format") or "").upper()
+        if file_url and _is_downloadable_resource(file_format, file_url):
+            filename = _filename_from_url(file_url, f"{resource['id']}.bin")
+            dest = download_dir / filename
+
+            # Skip if already complete
+            expected = result.get("size") or 0
+            try:
+                expected = int(expected)
+            except Exception:
+                expected = 0
+            if dest.exists() and expected > 0 and dest.stat().st_size == expected:
+                _log(f"Skipping {filename} (already complete)")
+                return
+
+            ok = _download_with_resume(file_url, dest, max_retries=5, expected_size=expected or None)
+            if ok:
+                _log(f"Saved file: {dest}")
+            else:
+                if dest.exists():
+                    dest.unlink(missing_ok=True)
+                _log(f"Could not download {file_url}")
+        elif file_url:
+            _log(f"Skipping non-data resource '{resource.get('name')}' ({file_format or 'unknown'}).")
+
+    items = [
+        (idx, resource)
+        for idx, resource in enumerate(package_json["result"]["resources"])
+        if not resource.get("datastore_active", False)
+    ]
+    with ThreadPoolExecutor(max_workers=RESOURCE_WORKERS) as executor:
+        for _ in executor.map(_process_resource, items):
+            pass
 
 def download_station_data():
     """
     Download station information and status from Toronto's bike share GBFS feed.
-    Saves the data as CSV files.
+    Saves the data as CSV files. Cached discovery/feed JSON under data/raw is
+    reused while younger than GBFS_CACHE_TTL_SECONDS.
     """
     gbfs_url = "https://tor.publicbikesystem.net/ube/gbfs/v1/gbfs.json"
     gbfs_discovery_path = RAW_DIR / "bike-share-gbfs.json"
@@ -206,21 +372,20 @@ def download_station_data():
     gbfs_data = None
     for candidate_name in ("bike-share-gbfs.json", "bike-share-json.json"):
         cached_path = _locate_cached_file(candidate_name)
-        if not cached_path:
+        if not cached_path or not _is_fresh(cached_path):
             continue
         try:
-            with cached_path.open("r", encoding="utf-8") as f:
-                gbfs_data = json.load(f)
+            gbfs_data = orjson.loads(cached_path.read_bytes())
             break
         except Exception as exc:
             print(f"Could not read {cached_path}: {exc}")
 
     if not gbfs_data:
         try:
-            response = requests.get(gbfs_url, timeout=30)
+            response = SESSION.get(gbfs_url, timeout=30)
             response.raise_for_status()
-            gbfs_data = response.json()
-            _safe_write_json(gbfs_data, gbfs_discovery_path)
+            gbfs_data = orjson.loads(response.content)
+            _safe_write_json(gbfs_data, gbfs_discovery_path, ensure_dir=False)
         except Exception as exc:
             print(f"Failed to download GBFS discovery feed: {exc}")
             return
@@ -232,10 +397,13 @@ def download_station_data():
         url = feed_lookup.get(name)
         if not url:
             raise ValueError(f"Missing '{name}' feed URL in GBFS discovery.")
-        response = requests.get(url, timeout=30)
+        feed_path = RAW_DIR / f"{name}.json"
+        if _is_fresh(feed_path):
+            return orjson.loads(feed_path.read_bytes())
+        response = SESSION.get(url, timeout=30)
         response.raise_for_status()
-        payload = response.json()
-        _safe_write_json(payload, RAW_DIR / f"{name}.json")
+        payload = orjson.loads(response.content)
+        _safe_write_json(payload, feed_path, ensure_dir=False)
         return payload
 
     try:
@@ -245,64 +413,42 @@ def download_station_data():
         print(f"Failed to download GBFS feeds: {exc}")
         return
 
-    info_stations = _dedupe_by_station_id(station_info.get("data", {}).get("stations", []))
-    status_stations = _dedupe_by_station_id(station_status.get("data", {}).get("stations", []))
-    if not info_stations or not status_stations:
+    info_tbl = _dedupe_by_station_id(_rows_to_table(station_info.get("data", {}).get("stations", [])))
+    status_tbl = _dedupe_by_station_id(_rows_to_table(station_status.get("data", {}).get("stations", [])))
+    if not info_tbl.num_rows or not status_tbl.num_rows:
         print("Station feeds returned no station records.")
         return
 
-    RAW_DIR.mkdir(parents=True, exist_ok=True)
     info_csv = RAW_DIR / "station_information.csv"
     status_csv = RAW_DIR / "station_status.csv"
     combined_csv = RAW_DIR / "station_details.csv"
 
-    info_fields = _collect_fieldnames(info_stations)
-    _write_csv(info_csv, info_stations, info_fields)
+    _write_table_csv(info_tbl, info_csv)
     print(f"Saved station information CSV: {info_csv}")
 
-    status_fields = _collect_fieldnames(status_stations)
-    _write_csv(status_csv, status_stations, status_fields)
+    _write_table_csv(status_tbl, status_csv)
     print(f"Saved station status CSV: {status_csv}")
 
-    info_lookup = {row["station_id"]: row for row in info_stations if "station_id" in row}
-    combined_fieldnames = info_fields + [field for field in status_fields if field not in info_fields]
-    combined_rows = []
-    for status_row in status_stations:
-        station_id = status_row.get("station_id")
-        combined_row = {**info_lookup.get(station_id, {}), **status_row}
-        combined_rows.append(combined_row)
-
-    _write_csv(combined_csv, combined_rows, combined_fieldnames)
+    # One row per status record; like {**info, **status}, status values win over same-named
+    # info fields, but info values are kept where the status record has none
+    info_fields = info_tbl.column_names
+    combined_fieldnames = info_fields + [field for field in status_tbl.column_names if field not in info_fields]
+    overlap = [field for field in info_fields if field != "station_id" and field in status_tbl.column_names]
+    info_side = info_tbl.rename_columns(
+        [f"__info_{field}" if field in overlap else field for field in info_fields]
+    )
+    status_side = status_tbl.append_column("__order", pa.array(range(status_tbl.num_rows), pa.int64()))
+    joined = info_side.join(status_side, keys="station_id", join_type="right outer").sort_by("__order")
+    for field in overlap:
+        merged = _coalesce_columns(joined.column(field), joined.column(f"__info_{field}"))
+        joined = joined.set_column(joined.schema.get_field_index(field), field, merged)
+    combined = joined.select(combined_fieldnames)
+
+    _write_table_csv(combined, combined_csv)
     print(f"Saved combined station details CSV: {combined_csv}")
-=======
-            # Save resource_show metadata
-            meta_path = RAW_DIR / f"resource_{idx}_{resource['id']}_metadata.json"
-            _safe_write_json(resource_metadata, meta_path)
-
-            # If there's a direct file URL, download it
-            result = resource_metadata.get("result", {})
-            file_url = result.get("url")
-            if file_url:
-                filename = _filename_from_url(file_url, f"{resource['id']}.bin")
-                dest = RAW_DIR / filename
-                try:
-                    with requests.get(file_url, stream=True) as r:
-                        r.raise_for_status()
-                        dest.parent.mkdir(parents=True, exist_ok=True)
-                        with dest.open("wb") as f:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                if chunk:
-                                    f.write(chunk)
-                    print(f"Saved file: {dest}")
-                except Exception as e:
-                    print(f"Could not download {file_url}: {e}")
->>>>>>> 2849b4a22882a8be5f61de6c73303a6464272473
 
 if __name__ == "__main__":
     for PID in (PACKAGE_ID_RIDERSHIP, PACKAGE_ID_STATION):
         pkg = get_package_json(PID)
         print_and_save_non_datastore_resources(pkg, PID)
-<<<<<<< HEAD
     download_station_data()
-=======
->>>>>>> 2849b4a22882a8be5f61de6c73303a6464272473
@@ -1,30 +1,29 @@
 import os
-import json
+import orjson
 from pathlib import Path
 import csv
-import requests
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-import time
+from concurrent.futures import ThreadPoolExecutor
+from http_client import TokenBucket, make_session
 
 
 
 RAW_DIR = Path("data") / "raw"
 load_dotenv()
 
+# Pooled session shared by all Meteostat chunk requests.
+SESSION = make_session()
+
+# Monthly chunks are independent GETs, so a few run concurrently under a shared rate limit.
+CHUNK_WORKERS = 4
+METEOSTAT_REQUESTS_PER_SECOND = 1
+
+METEOSTAT_BUCKET = TokenBucket(METEOSTAT_REQUESTS_PER_SECOND)
+
 def _collect_fieldnames(rows):
-    ordered = []
-    for row in rows:
-        for key in row.keys():
-            if key not in ordered:
-                ordered.append(key)
-    return ordered
-
-def _write_csv(path: Path, rows, fieldnames):
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(rows)
+    # dict keeps first-seen order and gives O(1) membership checks
+    return list(dict.fromkeys(key for row in rows for key in row))
 
 def _daterange_chunks(start_str: str, end_str: str, chunk_days: int = 30):
     """
@@ -38,26 +37,16 @@ def _daterange_chunks(start_str: str, end_str: str, chunk_days: int = 30):
         yield cur.isoformat(), chunk_end.isoformat()
         cur = chunk_end + timedelta(days=1)
 
-def _request_with_retries(url, headers, params, retries: int = 3, base_sleep: float = 1.0):
+def _request_with_retries(url, headers, params):
     """
-    Basic retry for 429/5xx or connection issues.
+    GET a Meteostat endpoint and return the decoded JSON payload.
+    429/5xx and connection errors are retried with backoff by the session adapter;
+    METEOSTAT_BUCKET keeps the request rate under the RapidAPI plan limit.
     """
-    for attempt in range(1, retries + 1):
-        try:
-            resp = requests.get(url, headers=headers, params=params, timeout=30)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.HTTPError as http_err:
-            code = getattr(http_err.response, "status_code", None)
-            if code in (429, 500, 502, 503, 504) and attempt < retries:
-                time.sleep(base_sleep * attempt)
-                continue
-            raise
-        except Exception:
-            if attempt < retries:
-                time.sleep(base_sleep * attempt)
-                continue
-            raise
+    METEOSTAT_BUCKET.acquire()
+    resp = SESSION.get(url, headers=headers, params=params, timeout=30)
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
 
 def download_hourly_weather_data(
     station_id: str = "10637",
@@ -84,46 +73,70 @@ def download_hourly_weather_data(
     json_path = RAW_DIR / f"weather_hourly_{station_id}.json"
     csv_path = RAW_DIR / f"weather_hourly_{station_id}.csv"
 
-    all_rows = []
+    chunks = list(_daterange_chunks(start, end, chunk_days=30))
+
+    def _fetch_chunk(rng):
+        c_start, c_end = rng
+        params = {"station": station_id, "start": c_start, "end": c_end}
+        try:
+            return _request_with_retries(url, headers, params)
+        except Exception as exc:
+            print(f"Failed chunk {c_start} to {c_end}: {exc}")
+            return None
+
+    # Rows are streamed to disk chunk by chunk; only the running counts stay in memory.
+    # The CSV header comes from the first non-empty chunk (Meteostat's schema is fixed).
+    # Both files are written to .part siblings and renamed into place only once complete,
+    # so a failure mid-download never leaves a truncated JSON/CSV behind.
+    json_tmp = json_path.with_name(json_path.name + ".part")
+    csv_tmp = csv_path.with_name(csv_path.name + ".part")
+    row_count = 0
     chunk_count = 0
+    writer = None
+    row_sep = b",\n    "
     try:
-        for c_start, c_end in _daterange_chunks(start, end, chunk_days=30):
-            params = {"station": station_id, "start": c_start, "end": c_end}
-            try:
-                payload = _request_with_retries(url, headers, params, retries=3, base_sleep=1.5)
-            except Exception as exc:
-                print(f"Failed chunk {c_start} to {c_end}: {exc}")
-                continue
-
-            rows = payload.get("data", []) or []
-            if rows:
-                all_rows.extend(rows)
-            chunk_count += 1
-            # Gentle pacing to be nice to the API
-            time.sleep(0.2)
+        with csv_tmp.open("w", newline="", encoding="utf-8") as csv_f, json_tmp.open("wb") as json_f:
+            json_f.write(b'{\n  "data": [')
+            # map() yields payloads in chunk order, so rows stay chronological
+            with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+                for payload in executor.map(_fetch_chunk, chunks):
+                    if payload is None:
+                        continue
+                    chunk_count += 1
+                    rows = payload.get("data", []) or []
+                    if not rows:
+                        continue
+
+                    if writer is None:
+                        writer = csv.DictWriter(csv_f, fieldnames=_collect_fieldnames(rows), extrasaction="ignore")
+                        writer.writeheader()
+                    writer.writerows(rows)
+
+                    json_f.write(row_sep if row_count else b"\n    ")
+                    json_f.write(row_sep.join(orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS) for row in rows))
+                    row_count += len(rows)
+
+            meta = {
+                "station": station_id,
+                "start": start,
+                "end": end,
+                "chunks": chunk_count,
+                "source_url": url,
+            }
+            json_f.write(b'\n  ],\n  "meta": ' + orjson.dumps(meta) + b"\n}\n")
 
     except Exception as exc:
+        json_tmp.unlink(missing_ok=True)
+        csv_tmp.unlink(missing_ok=True)
         print(f"Failed to download Meteostat data: {exc}")
         return
 
-    aggregated = {
-        "meta": {
-            "station": station_id,
-            "start": start,
-            "end": end,
-            "chunks": chunk_count,
-            "source_url": url,
-        },
-        "data": all_rows,
-    }
-
-    with json_path.open("w", encoding="utf-8") as f:
-        json.dump(aggregated, f, ensure_ascii=False, indent=2)
-
-    if all_rows:
-        _write_csv(csv_path, all_rows, _collect_fieldnames(all_rows))
-        print(f"Saved weather CSV: {csv_path} ({len(all_rows)} rows across {chunk_count} chunks)")
+    json_tmp.replace(json_path)
+    if row_count:
+        csv_tmp.replace(csv_path)
+        print(f"Saved weather CSV: {csv_path} ({row_count} rows across {chunk_count} chunks)")
     else:
+        csv_tmp.unlink(missing_ok=True)
         print(f"No Meteostat data rows returned across {chunk_count} chunks.")
 
 if __name__ == "__main__":
@@ -1,58 +1,92 @@
+import os
+import itertools
 import zipfile
 from pathlib import Path
 import shutil
-import json
+import codecs
+import orjson
 import requests
 import time
-from collections import defaultdict
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pandas as pd
+from http_client import make_session
 
 RAW_DIR = Path("data") / "raw" / "bike-share-toronto-ridership-data" / "downloads"
 META_DIR = Path("data") / "raw" / "bike-share-toronto-ridership-data" / "metadata"
 INTERIM_DIR = Path("data") / "interim"
 
-def _find_year_resource_url(year: int) -> str | None:
+# Each year's ZIP is extracted/split in its own process.
+YEAR_WORKERS = 8
+
+# Large I/O buffers so big CSV members and ZIP downloads aren't copied in 8-16 KiB pieces.
+EXTRACT_BUFFER_SIZE = 1 << 20
+DOWNLOAD_BUFFER_SIZE = 4 << 20
+
+# Pooled session for re-downloading corrupted ZIPs.
+SESSION = make_session()
+
+# Quarter tag in a member name, e.g. "(Q1 2017)" or "_Q4"; not part of a longer word or number.
+_QUARTER_RE = re.compile(r"(?<![a-z])q[1-4](?![0-9])", re.I)
+_YEAR_IN_NAME_RE = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+def _load_all_metadata() -> dict[int, str]:
     """
-    Inspect saved CKAN resource_show metadata to locate the download URL for a given year.
+    Parse the saved CKAN resource_show metadata and map each year named
+    in a resource to its download URL (first file in sorted order wins).
+    Called once in the parent process; the map is handed to every year worker.
     """
+    urls: dict[int, str] = {}
     if not META_DIR.exists():
-        return None
-    for meta in sorted(META_DIR.glob("*_metadata.json")):
+        return urls
+    with os.scandir(META_DIR) as entries:
+        metas = sorted(e.path for e in entries if e.name.endswith("_metadata.json"))
+    for meta in metas:
         try:
-            with meta.open("r", encoding="utf-8") as f:
-                doc = json.load(f)
+            with open(meta, "rb") as f:
+                doc = orjson.loads(f.read())
             res = doc.get("result", {}) or {}
             name = (res.get("name") or "").lower()
             url = res.get("url")
-            if str(year) in name and url:
-                return url
-        except Exception:
+            if not url:
+                continue
+            for year in _YEAR_IN_NAME_RE.findall(name):
+                urls.setdefault(int(year), url)
+        except (OSError, orjson.JSONDecodeError):
             continue
-    return None
+    return urls
 
 def _head_content_length(url: str) -> int | None:
     try:
-        r = requests.head(url, timeout=15, allow_redirects=True)
+        r = SESSION.head(url, timeout=15, allow_redirects=True)
         if r.ok:
             return int(r.headers.get("content-length") or 0) or None
-    except Exception:
+    except (requests.RequestException, ValueError):
         pass
     return None
 
 def _download_with_resume(file_url: str, dest: Path, max_retries: int = 5) -> bool:
     dest.parent.mkdir(parents=True, exist_ok=True)
-    expected_size = _head_content_length(file_url)
+    expected_size = None
     for attempt in range(1, max_retries + 1):
         try:
             headers = {}
             mode = "wb"
             existing = dest.stat().st_size if dest.exists() else 0
+            # Only a partial file needs the total size up front; otherwise the GET reports it
+            if existing and expected_size is None:
+                expected_size = _head_content_length(file_url)
             if existing and (expected_size is None or existing < expected_size):
                 headers["Range"] = f"bytes={existing}-"
                 mode = "ab"
-            with requests.get(file_url, stream=True, headers=headers, timeout=60) as r:
+            with SESSION.get(file_url, stream=True, headers=headers, timeout=60) as r:
                 r.raise_for_status()
-                with dest.open(mode) as f:
+                if r.status_code != 206:
+                    # Server ignored the Range header and sent the whole file
+                    mode = "wb"
+                    expected_size = int(r.headers.get("content-length") or 0) or expected_size
+                with dest.open(mode, buffering=DOWNLOAD_BUFFER_SIZE) as f:
                     for chunk in r.iter_content(chunk_size=2 * 1024 * 1024):
                         if chunk:
                             f.write(chunk)
@@ -60,7 +94,7 @@ def _download_with_resume(file_url: str, dest: Path, max_retries: int = 5) -> bo
                 time.sleep(1.2 * attempt)
                 continue
             return True
-        except Exception:
+        except (requests.RequestException, OSError):
             if attempt == max_retries:
                 break
             time.sleep(1.2 * attempt)
@@ -84,43 +118,41 @@ def _infer_start_datetime_field(headers: list[str]) -> str | None:
             return name
     return None
 
-# Replace simple regex with robust parsing of multiple formats
-_y_m_d = re.compile(r"(?P<year>\d{4})[-/](?P<month>\d{1,2})(?:[-/]\d{1,2})?")
-_m_d_y = re.compile(r"(?P<month>\d{1,2})[-/](?P<day>\d{1,2})[-/](?P<year>\d{4})")
-_d_m_y = re.compile(r"(?P<day>\d{1,2})[-/](?P<month>\d{1,2})[-/](?P<year>\d{4})")
+# One fused pattern for a whole date token: YYYY-MM[-DD] or NN/NN/YYYY (MM/DD or DD/MM).
+# Used with fullmatch, so ids like '2018-1234' that merely start like a date are rejected.
+_DATE_RE = re.compile(
+    r"(?:(?P<y1>\d{4})[-/](?P<m1>\d{1,2})(?:[-/]\d{1,2})?"
+    r"|(?P<a>\d{1,2})[-/](?P<b>\d{1,2})[-/](?P<y2>\d{4}))"
+)
 
 def _parse_year_month_any(value: str) -> tuple[int, int] | None:
     """
-    Extract (year, month) from a variety of date strings:
+    Extract (year, month) from the leading date token of a variety of date strings:
     - YYYY-MM-DD or YYYY/MM/DD
     - MM/DD/YYYY
-    - DD/MM/YYYY
-    - ISO-like strings containing those patterns
+    - DD/MM/YYYY (when the first field is > 12)
+    - timestamps where that date is followed by a space or 'T' and a time
     """
     if not value:
         return None
     v = str(value).strip()
-    # Try YYYY-MM
-    m = _y_m_d.search(v)
-    if m:
-        y = int(m.group("year"))
-        mm = int(m.group("month"))
-        if 1 <= mm <= 12:
-            return (y, mm)
-    # Try MM/DD/YYYY
-    m = _m_d_y.search(v)
-    if m:
-        y = int(m.group("year"))
-        mm = int(m.group("month"))
-        if 1 <= mm <= 12:
-            return (y, mm)
-    # Try DD/MM/YYYY
-    m = _d_m_y.search(v)
-    if m:
-        y = int(m.group("year"))
-        mm = int(m.group("month"))
-        if 1 <= mm <= 12:
-            return (y, mm)
+    # Cheap reject before the regex: real timestamps are at least 'YYYY-MM' long and start with a digit
+    if len(v) < 7 or not v[0].isdigit():
+        return None
+    # The date token ends at the first space or ISO 'T' separator
+    token = v.partition(" ")[0].partition("T")[0]
+    m = _DATE_RE.fullmatch(token)
+    if not m:
+        return None
+    if m.group("y1"):
+        y, mm = int(m.group("y1")), int(m.group("m1"))
+    else:
+        a, b = int(m.group("a")), int(m.group("b"))
+        y = int(m.group("y2"))
+        # Day-first only when the first field cannot be a month; otherwise MM/DD
+        mm = b if a > 12 else a
+    if 1 <= mm <= 12:
+        return (y, mm)
     return None
 
 def _extract_year_month(value: str, expected_year: int) -> str | None:
@@ -135,147 +167,287 @@ def _extract_year_month(value: str, expected_year: int) -> str | None:
         return None
     return f"{y}-{m:02d}"
 
+# Rows per pandas chunk when streaming quarterly CSVs into monthly files.
+QUARTER_CHUNK_ROWS = 200_000
+# Quarter files of one year are parsed concurrently on this many threads.
+QUARTER_WORKERS = 4
+# Rows serialized per batch inside DataFrame.to_csv for each month slice.
+MONTH_WRITE_CHUNK_ROWS = 100_000
+
+def _quarter_encoding(qf: Path) -> str:
+    """
+    Return 'utf-8-sig' if the whole file decodes as UTF-8, else 'latin-1'.
+    Checked up front so a chunked read never fails after writing part of a file.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        with qf.open("rb") as f:
+            while block := f.read(1 << 20):
+                decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8-sig"
+
+def _read_quarter(qf: Path, chunksize: int = QUARTER_CHUNK_ROWS):
+    """
+    Stream a quarterly CSV as string-typed DataFrame chunks.
+    NA detection is off so cells like 'NA' or 'null' are written back verbatim.
+    Only the header's columns are read, so ragged rows are truncated or padded
+    (as DictReader/DictWriter did) instead of raising ParserError.
+    """
+    encoding = _quarter_encoding(qf)
+    n_cols = len(pd.read_csv(qf, encoding=encoding, nrows=0).columns)
+    return pd.read_csv(
+        qf, encoding=encoding, dtype=str, keep_default_na=False, na_filter=False,
+        usecols=range(n_cols), low_memory=False, chunksize=chunksize,
+    )
+
+# The start column is trusted (no per-row fallback scan) when it dates this share of the first rows.
+TRUST_PROBE_ROWS = 50
+TRUST_MIN_HIT_RATE = 0.9
+
+def _discover_date_column(row: pd.Series) -> str | None:
+    """
+    Return the first column whose value in this row parses as a date.
+    """
+    for col, v in row.items():
+        if isinstance(v, str) and _parse_year_month_any(v):
+            return col
+    return None
+
+def _month_labels(
+    df: pd.DataFrame, start_col: str | None, year_int: int, scan_fallback: bool = True
+) -> pd.Series:
+    """
+    Return a 'YYYY-MM' label per row (NA when no date in year_int is found).
+    """
+    ym = pd.Series(pd.NA, index=df.index, dtype="object")
+
+    # Prefer inferred start column if available, parsed vectorized with the format pandas
+    # infers from the first value
+    if start_col:
+        dt = pd.to_datetime(df[start_col], errors="coerce")
+        in_year = dt.dt.year == year_int
+        ym[in_year] = dt[in_year].dt.to_period("M").astype(str)
+        # Values in any other format (day-first, ISO inside an M/D/Y file) come back NaT;
+        # re-parse just those with the regex on this column, trusted or not
+        unparsed = dt.isna()
+        if unparsed.any():
+            ym[unparsed] = [
+                _extract_year_month(v, year_int) or pd.NA for v in df.loc[unparsed, start_col]
+            ]
+
+    # Fallback: scan all columns of unparsed rows for a parsable date
+    missing = ym.isna()
+    if scan_fallback and missing.any():
+        def _scan_row(row):
+            for v in row:
+                # Only values with a date separator can parse; skips names, ids, user types
+                if isinstance(v, str) and ("-" in v or "/" in v):
+                    found = _extract_year_month(v, year_int)
+                    if found:
+                        return found
+            return pd.NA
+        # Plain positional tuples: no per-row Series construction or label lookups
+        ym[missing] = [_scan_row(row) for row in df[missing].itertuples(index=False, name=None)]
+    return ym
+
+def _plan_date_parsing(df: pd.DataFrame, year_int: int) -> tuple[str | None, bool]:
+    """
+    Decide, once per file from its first chunk, which column holds the trip date
+    and whether rows it fails on still need the all-columns fallback scan.
+    """
+    start_col = _infer_start_datetime_field(list(df.columns))
+    if start_col is None and len(df):
+        # No recognisable header: find the date column from the first row instead of scanning every row
+        start_col = _discover_date_column(df.iloc[0])
+    if start_col is None:
+        return None, True
+    # Probe with the regex parser, not pandas' single guessed format, so the hit rate reflects
+    # whether the column holds dates at all rather than whether its first rows share a format
+    probe = df[start_col].head(TRUST_PROBE_ROWS)
+    hits = sum(1 for v in probe if _extract_year_month(v, year_int))
+    return start_col, hits < TRUST_MIN_HIT_RATE * max(len(probe), 1)
+
+def _read_header(qf: Path) -> list[str]:
+    """
+    Read only the header row of a quarterly CSV.
+    """
+    try:
+        return list(pd.read_csv(qf, encoding="utf-8-sig", nrows=0).columns)
+    except UnicodeDecodeError:
+        return list(pd.read_csv(qf, encoding="latin-1", nrows=0).columns)
+
 def _split_quarterly_to_monthly(year_dir: Path, quarter_files: list[Path], year_int: int) -> int:
     """
     Read quarterly CSVs and write 12 monthly CSVs into year_dir.
+    Quarters are parsed on threads (the pandas C parser releases the GIL) and
+    each chunk's rows are appended to per-month files opened on first use.
     Returns number of monthly files written.
     """
-    monthly_buckets: dict[str, list[dict]] = defaultdict(list)
     header_order: list[str] | None = None
-
     for qf in quarter_files:
         try:
-            # Try utf-8-sig first, then latin-1 if needed
-            try:
-                f = qf.open("r", encoding="utf-8-sig", newline="")
-                close_f = True
-            except UnicodeDecodeError:
-                f = qf.open("r", encoding="latin-1", newline="")
-                close_f = True
-
-            with f:
-                import csv as _csv
-                reader = _csv.DictReader(f)
-                if reader.fieldnames and header_order is None:
-                    header_order = list(reader.fieldnames)
-
-                start_col = _infer_start_datetime_field(reader.fieldnames or [])
-
-                for row in reader:
-                    ym = None
-
-                    # Prefer inferred start column if available
-                    if start_col:
-                        ym = _extract_year_month(row.get(start_col, ""), year_int)
-
-                    # Fallback: scan all columns for a parsable date
-                    if not ym:
-                        for v in row.values():
-                            ym = _extract_year_month(v, year_int)
-                            if ym:
-                                break
-
-                    if ym:
-                        monthly_buckets[ym].append(row)
-        except Exception as e:
+            header_order = _read_header(qf)
+            break
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, OSError) as e:
             print(f"  -> Failed reading {qf.name}: {e}")
-
-    if not monthly_buckets or header_order is None:
+    if header_order is None:
         return 0
+    header_line = pd.DataFrame(columns=header_order).to_csv(index=False)
+
+    handles: dict[str, object] = {}
+    handles_lock = threading.Lock()
 
-    # Write monthly CSVs
-    written = 0
-    for ym, rows in sorted(monthly_buckets.items()):
-        out_path = year_dir / f"{ym}.csv"
+    def _split_quarter(qf: Path) -> bool:
+        """
+        Append one quarter's rows to the month files. True only if the whole file
+        was read and at least one row landed in a month file.
+        """
+        emitted = False
         try:
-            with out_path.open("w", encoding="utf-8", newline="") as f:
-                import csv as _csv
-                writer = _csv.DictWriter(f, fieldnames=header_order, extrasaction="ignore")
-                writer.writeheader()
-                writer.writerows(rows)
-            written += 1
-        except Exception as e:
-            print(f"  -> Failed writing {out_path.name}: {e}")
-
-    # Remove quarterly CSVs after successful split
-    if written > 0:
-        for qf in quarter_files:
-            try:
-                qf.unlink(missing_ok=True)
-            except Exception:
-                pass
+            plan = None
+            for df in _read_quarter(qf):
+                if plan is None:
+                    plan = _plan_date_parsing(df, year_int)
+                start_col, scan_fallback = plan
+                ym = _month_labels(df, start_col, year_int, scan_fallback)
+                # Align columns once per chunk, then slice each month by row positions
+                if list(df.columns) != header_order:
+                    df = df.reindex(columns=header_order)
+                # Render outside the lock; only the file appends are serialized
+                parts = [
+                    (month, df.take(positions).to_csv(
+                        index=False, header=False, chunksize=MONTH_WRITE_CHUNK_ROWS
+                    ))
+                    for month, positions in ym.groupby(ym).indices.items()
+                ]
+                with handles_lock:
+                    for month, text in parts:
+                        f = handles.get(month)
+                        if f is None:
+                            f = (year_dir / f"{month}.csv").open("w", encoding="utf-8", newline="")
+                            f.write(header_line)
+                            handles[month] = f
+                        f.write(text)
+                emitted = emitted or bool(parts)
+            return emitted
+        except UnicodeDecodeError as e:
+            print(f"  -> Failed decoding {qf.name}: {e}")
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, OSError) as e:
+            print(f"  -> Failed reading {qf.name}: {e}")
+        return False
+
+    split_ok: list[bool] = []
+    try:
+        with ThreadPoolExecutor(max_workers=QUARTER_WORKERS) as executor:
+            split_ok = list(executor.map(_split_quarter, quarter_files))
+    finally:
+        for f in handles.values():
+            f.close()
+
+    written = len(handles)
+
+    # Remove only the quarterly CSVs that were split completely and produced rows;
+    # a failed or dateless one keeps its source
+    for qf, ok in zip(quarter_files, split_ok):
+        if not ok:
+            continue
+        try:
+            qf.unlink(missing_ok=True)
+        except OSError:
+            pass
 
     return written
 
+def _process_year(zip_path: Path, resource_urls: dict[int, str]) -> str:
+    """
+    Extract one year's ridership ZIP into data/interim/ridership_{year}, splitting
+    quarterly CSVs into months when needed. Returns the status lines to print.
+    Runs in a worker process, so it only touches module-level constants and its
+    arguments; resource_urls is the year -> download URL map from _load_all_metadata.
+    """
+    year = zip_path.stem.split('-')[-1]
+    try:
+        year_int = int(year)
+        if year_int < 2017 or year_int > 2024:
+            return ""
+    except ValueError:
+        return ""
+
+    year_dir = INTERIM_DIR / f"ridership_{year}"
+    year_dir.mkdir(exist_ok=True)
+    messages = [f"Extracting {zip_path.name} to {year_dir}"]
+
+    # Validate ZIP; if broken, try to re-download it first
+    if not zipfile.is_zipfile(zip_path):
+        messages.append(f"  -> {zip_path.name} appears corrupted. Attempting re-download...")
+        url = resource_urls.get(year_int)
+        if not url:
+            messages.append(f"  -> No metadata URL found for {year}. Skipping.")
+            return "\n".join(messages)
+        if not _download_with_resume(url, zip_path, max_retries=6):
+            messages.append(f"  -> Re-download failed for {year}. Skipping.")
+            return "\n".join(messages)
+        if not zipfile.is_zipfile(zip_path):
+            messages.append(f"  -> File still invalid after re-download. Skipping.")
+            return "\n".join(messages)
+
+    try:
+        monthly_files = []
+        quarterly_files = []
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            # Only CSV files (case-insensitive), skipping directories
+            csv_members = [
+                m for m in zip_ref.namelist()
+                if not m.endswith('/') and m.lower().endswith('.csv')
+            ]
+            for member in csv_members:
+                # Flatten extraction: only the basename is used, so '../' or absolute
+                # member names can never write outside year_dir
+                name = Path(member).name
+                target_path = year_dir / name
+                with zip_ref.open(member) as source, target_path.open('wb', buffering=EXTRACT_BUFFER_SIZE) as target:
+                    shutil.copyfileobj(source, target, length=EXTRACT_BUFFER_SIZE)
+                # Track monthly vs quarterly
+                if _QUARTER_RE.search(name):
+                    quarterly_files.append(target_path)
+                else:
+                    monthly_files.append(target_path)
+        # If no monthly but we have quarterly, split into monthly files
+        if not monthly_files and quarterly_files:
+            messages.append(f"  -> No monthly CSVs found; splitting {len(quarterly_files)} quarterly CSVs into months")
+            written = _split_quarterly_to_monthly(year_dir, quarterly_files, year_int)
+            messages.append(f"  -> Created {written} monthly CSV files from quarterly data")
+            csv_count = written
+        else:
+            # Already known from extraction; set() guards against same-named nested members
+            csv_count = len(set(monthly_files)) + len(set(quarterly_files))
+        messages.append(f"  -> Extracted {csv_count} monthly CSV files")
+    except Exception as e:
+        messages.append(f"  -> Error extracting {zip_path.name}: {e}")
+    return "\n".join(messages)
+
 def unzip_ridership_files():
     """
     Unzip all ridership ZIP files from 2017-2024 and extract to data/interim.
     Each ZIP contains monthly CSV files. If only quarterly CSVs are present,
-    they are split into monthly CSVs.
+    they are split into monthly CSVs. Years are independent, so each runs in
+    its own process; status is printed per year in order.
     """
     INTERIM_DIR.mkdir(parents=True, exist_ok=True)
     zip_files = sorted(RAW_DIR.glob("bikeshare-ridership-20*.zip"))
+    if not zip_files:
+        return
 
-    for zip_path in zip_files:
-        year = zip_path.stem.split('-')[-1]
-        try:
-            year_int = int(year)
-            if year_int < 2017 or year_int > 2024:
-                continue
-        except ValueError:
-            continue
-
-        year_dir = INTERIM_DIR / f"ridership_{year}"
-        year_dir.mkdir(exist_ok=True)
-        print(f"Extracting {zip_path.name} to {year_dir}")
-
-        # Validate ZIP; if broken, try to re-download it first
-        if not zipfile.is_zipfile(zip_path):
-            print(f"  -> {zip_path.name} appears corrupted. Attempting re-download...")
-            url = _find_year_resource_url(year_int)
-            if not url:
-                print(f"  -> No metadata URL found for {year}. Skipping.")
-                continue
-            if not _download_with_resume(url, zip_path, max_retries=6):
-                print(f"  -> Re-download failed for {year}. Skipping.")
-                continue
-            if not zipfile.is_zipfile(zip_path):
-                print(f"  -> File still invalid after re-download. Skipping.")
-                continue
-
-        try:
-            monthly_files = []
-            quarterly_files = []
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                for member in zip_ref.namelist():
-                    # Skip directories
-                    if member.endswith('/'):
-                        continue
-                    name = Path(member).name
-                    name_lower = name.lower()
-                    # Only CSV files (case-insensitive)
-                    if not name_lower.endswith('.csv'):
-                        continue
-                    # Flatten extraction
-                    target_path = year_dir / name
-                    with zip_ref.open(member) as source, target_path.open('wb') as target:
-                        shutil.copyfileobj(source, target)
-                    # Track monthly vs quarterly
-                    if any(q in name_lower for q in ('q1', 'q2', 'q3', 'q4')):
-                        quarterly_files.append(target_path)
-                    else:
-                        monthly_files.append(target_path)
-            # If no monthly but we have quarterly, split into monthly files
-            if not monthly_files and quarterly_files:
-                print(f"  -> No monthly CSVs found; splitting {len(quarterly_files)} quarterly CSVs into months")
-                written = _split_quarterly_to_monthly(year_dir, quarterly_files, year_int)
-                print(f"  -> Created {written} monthly CSV files from quarterly data")
-                csv_count = len(list(year_dir.glob('*.csv')))
-            else:
-                csv_count = len(list(year_dir.glob('*.csv')))
-            print(f"  -> Extracted {csv_count} monthly CSV files")
-        except Exception as e:
-            print(f"  -> Error extracting {zip_path.name}: {e}")
+    # Parse the metadata once here rather than once per worker process
+    resource_urls = _load_all_metadata()
+    workers = min(YEAR_WORKERS, os.cpu_count() or 1, len(zip_files))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for msg in executor.map(_process_year, zip_files, itertools.repeat(resource_urls)):
+            if msg:
+                print(msg)
 
 if __name__ == "__main__":
     unzip_ridership_files()
\ No newline at end of file